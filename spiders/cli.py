@@ -0,0 +1,130 @@
+"""
+命令行入口
+统一提供 crawl / backfill / worker / proxies / stats 子命令，
+浏览器和HTML解析等较重的依赖只在对应子命令实际需要时才导入
+
+用法（在项目根目录下运行）:
+    python spiders/cli.py crawl
+    python spiders/cli.py backfill --start 20250101 --end 20250617
+    python spiders/cli.py worker
+    python spiders/cli.py proxies scrape
+    python spiders/cli.py proxies validate --input valid_proxies.json
+    python spiders/cli.py stats
+"""
+
+import sys
+import logging
+import argparse
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+def _date(value: str) -> str:
+    """校验 YYYYMMDD 格式的日期参数"""
+    try:
+        datetime.strptime(value, '%Y%m%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYYMMDD: {value}")
+    return value
+
+def cmd_crawl(args):
+    """按抓取计划获取最近一天的报告并下载"""
+    from crawler import RoboCrawler
+    RoboCrawler().run()
+
+def cmd_backfill(args):
+    """获取指定日期范围内的报告并下载"""
+    from crawler import RoboCrawler
+    crawler = RoboCrawler()
+    crawler.date_range = {'pubTimeStart': args.start, 'pubTimeEnd': args.end}
+    if args.enqueue_only:
+        crawler.login()
+        crawler.fetch_plan()
+        crawler.queue.enqueue(crawler.idset)
+    else:
+        crawler.run()
+
+def cmd_worker(args):
+    """仅消费已有队列中的下载任务"""
+    from crawler import RoboCrawler
+    RoboCrawler().run_worker()
+
+def cmd_proxies_scrape(args):
+    """爬取并验证免费代理"""
+    import proxy_scraper
+    proxy_scraper.main(max_proxies=args.max, filename=args.output)
+
+def cmd_proxies_validate(args):
+    """重新验证已保存的代理"""
+    from proxy_fetcher import ProxyFetcher
+    from proxy_scraper import ProxyScraper
+    scraper = ProxyScraper()
+    proxies = ProxyFetcher().load_proxies(args.input)
+    valid_proxies = scraper.test_proxies_batch(proxies)
+    print(f"可用代理: {len(valid_proxies)}/{len(proxies)}")
+    scraper.save_proxies(valid_proxies, args.output or args.input)
+
+def cmd_stats(args):
+    """输出任务队列状态"""
+    from config import load_config
+    from job_queue import JobQueue
+    
+    status = JobQueue(**load_config().get('job_queue', {})).get_status()
+    for state in ('pending', 'leased', 'done', 'dead'):
+        print(f"{state:8s} {status[state]}")
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description='萝卜研报爬虫')
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出调试日志')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    crawl = subparsers.add_parser('crawl', help='获取最近一天的报告并下载')
+    crawl.set_defaults(func=cmd_crawl)
+    
+    backfill = subparsers.add_parser('backfill', help='获取指定日期范围内的报告并下载')
+    backfill.add_argument('--start', type=_date, required=True, help='开始日期 YYYYMMDD')
+    backfill.add_argument('--end', type=_date, required=True, help='结束日期 YYYYMMDD')
+    backfill.add_argument('--enqueue-only', action='store_true',
+                          help='只写入任务队列，下载交给 worker 进程')
+    backfill.set_defaults(func=cmd_backfill)
+    
+    worker = subparsers.add_parser('worker', help='消费任务队列中的下载任务')
+    worker.set_defaults(func=cmd_worker)
+    
+    proxies = subparsers.add_parser('proxies', help='代理管理')
+    proxy_commands = proxies.add_subparsers(dest='proxy_command', required=True)
+    scrape = proxy_commands.add_parser('scrape', help='爬取并验证免费代理')
+    scrape.add_argument('--max', type=int, default=30, help='最多保存的代理数')
+    scrape.add_argument('--output', default='valid_proxies.json', help='输出文件')
+    scrape.set_defaults(func=cmd_proxies_scrape)
+    validate = proxy_commands.add_parser('validate', help='重新验证已保存的代理')
+    validate.add_argument('--input', default='valid_proxies.json', help='代理文件')
+    validate.add_argument('--output', help='输出文件，默认覆盖输入文件')
+    validate.set_defaults(func=cmd_proxies_validate)
+    
+    stats = subparsers.add_parser('stats', help='查看任务队列状态')
+    stats.set_defaults(func=cmd_stats)
+    
+    return parser
+
+def main(argv=None):
+    """主函数"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'backfill' and args.start > args.end:
+        parser.error(f"开始日期 {args.start} 晚于结束日期 {args.end}")
+    
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    try:
+        args.func(args)
+    except KeyboardInterrupt:
+        logger.info("已中断")
+        return 130
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
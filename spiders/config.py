@@ -0,0 +1,22 @@
+"""
+配置加载
+yaml 仅在实际读取配置时导入
+"""
+
+import os
+
+def load_config(filename: str = 'sites.yaml', default=None):
+    """
+    加载 configs 目录下的配置文件
+    
+    Args:
+        filename: 配置文件名
+        default: 文件不存在时的返回值，为None时抛出FileNotFoundError
+    """
+    import yaml
+    
+    config_path = os.path.join('configs', filename)
+    if default is not None and not os.path.exists(config_path):
+        return default
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
@@ -1,36 +1,76 @@
 import os
-import yaml
 import json
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlencode
 import random
+import socket
+from config import load_config
+from job_queue import JobQueue
+from url_cache import DownloadUrlCache
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# 请求头
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Referer': 'https://robo.datayes.com/',
+    'Origin': 'https://robo.datayes.com',
+    'Connection': 'keep-alive'
+}
+
+class AuthError(Exception):
+    """登录状态失效"""
+
 class RoboCrawler:
     def __init__(self):
-        self.config = self._load_config()
+        self.config = load_config()
+        self.plan = self._load_plan()
         self.session = requests.Session()
+        # 所有查询共享同一会话，连接池容量不小于并发查询数
+        pool_size = max(self.plan['max_workers'], 10)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.idset = set()
+        self._idset_lock = threading.Lock()
         self.cookies = None
+        self._login_lock = threading.Lock()
+        self._relogged_in = False
+        self.date_range = None  # 指定日期范围时覆盖默认的最近一天
+        self.queue = JobQueue(**self.config.get('job_queue', {}))
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        
+        # 下载地址缓存与预解析
+        url_config = self.config.get('download_url', {})
+        self.url_cache = DownloadUrlCache(
+            maxsize=url_config.get('cache_size', 256),
+            safety_margin=url_config.get('safety_margin', 60)
+        )
+        self.prefetch_ahead = url_config.get('prefetch_ahead', 5)
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=url_config.get('prefetch_workers', 2))
+        self._prefetching = {}  # report_id -> 进行中的预解析任务
+        self._prefetch_lock = threading.Lock()
+        
+    def _load_plan(self):
+        """加载抓取计划，不存在时退化为 sites.yaml 中的单个查询"""
+        plan = load_config('crawl_plan.yaml', default={})
         
-    def _load_config(self):
-        """加载配置文件"""
-        config_path = os.path.join('configs', 'sites.yaml')
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        queries = plan.get('queries') or [{'name': 'default', 'params': {}}]
+        for i, query in enumerate(queries):
+            query.setdefault('name', f"query_{i}")
+            query['params'] = query.get('params') or {}
+        return {
+            'max_workers': int(plan.get('max_workers', 1)),
+            'queries': queries
+        }
     
     def _get_date_range(self):
         """获取日期范围"""
@@ -41,8 +81,73 @@ class RoboCrawler:
             'pubTimeStart': start_date.strftime('%Y%m%d')
         }
     
+    def _cookie_cache_path(self):
+        """cookies缓存文件路径"""
+        return self.config.get('cookie_cache', {}).get('path', os.path.join('data', 'cookies.json'))
+    
+    def _load_cached_cookies(self):
+        """加载未过期的缓存cookies，成功时返回True"""
+        cache_path = self._cookie_cache_path()
+        max_age = self.config.get('cookie_cache', {}).get('max_age', 1800)
+        
+        if not os.path.exists(cache_path):
+            return False
+        if time.time() - os.path.getmtime(cache_path) > max_age:
+            logger.info("缓存cookies已过期")
+            return False
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取缓存cookies失败: {str(e)}")
+            return False
+        
+        self.cookies = cookies
+        for cookie in self.cookies:
+            self.session.cookies.set(cookie['name'], cookie['value'])
+        logger.info("复用缓存cookies")
+        return True
+    
+    def _save_cookies(self):
+        """缓存cookies供后续运行复用，文件仅当前用户可读写"""
+        cache_path = self._cookie_cache_path()
+        try:
+            cache_dir = os.path.dirname(cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            fd = os.open(cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.chmod(cache_path, 0o600)  # 文件已存在时 os.open 不会修改权限
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.cookies, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"保存cookies失败: {str(e)}")
+    
+    def login(self):
+        """登录：优先复用缓存的cookies，不可用时使用浏览器登录"""
+        if not self._load_cached_cookies():
+            self.login_with_edge()
+    
+    def _relogin_once(self):
+        """登录状态失效时删除缓存cookies并重新登录，并发查询共享一次重新登录"""
+        with self._login_lock:
+            if self._relogged_in:
+                return
+            self._relogged_in = True
+            logger.warning("登录状态失效，重新登录")
+            try:
+                os.remove(self._cookie_cache_path())
+            except FileNotFoundError:
+                pass
+            self.login_with_edge()
+    
     def login_with_edge(self):
         """使用Edge浏览器登录并获取cookies"""
+        # 浏览器相关依赖较重，仅在需要登录时导入
+        from selenium import webdriver
+        from selenium.webdriver.edge.service import Service
+        from selenium.webdriver.edge.options import Options
+        from webdriver_manager.microsoft import EdgeChromiumDriverManager
+        
         try:
             options = Options()
             options.add_argument('--headless')  # 无头模式
@@ -64,19 +169,36 @@ class RoboCrawler:
                 self.session.cookies.set(cookie['name'], cookie['value'])
             
             driver.quit()
+            self._save_cookies()
             logger.info("登录成功并获取cookies")
             
         except Exception as e:
             logger.error(f"登录失败: {str(e)}")
             raise
     
-    def fetch_report_list(self):
-        """获取报告列表"""
+    def fetch_report_list(self, extra_params=None):
+        """获取报告列表，extra_params 覆盖默认查询参数，返回本次查询到的报告ID"""
+        try:
+            found = self._fetch_report_pages(extra_params)
+        except AuthError as e:
+            logger.warning(f"获取报告列表失败: {str(e)}")
+            self._relogin_once()
+            found = self._fetch_report_pages(extra_params)
+        
+        with self._idset_lock:
+            self.idset.update(found)
+        return found
+    
+    def _fetch_report_pages(self, extra_params=None):
+        """逐页获取单个查询的报告ID"""
         base_url = self.config['baseUrl_industry']
         params = self.config['params'].copy()
-        date_range = self._get_date_range()
+        date_range = self.date_range or self._get_date_range()
         params.update(date_range)
+        if extra_params:
+            params.update(extra_params)
         
+        found = set()
         page_now = 1
         while True:
             params['pageNow'] = page_now
@@ -84,13 +206,17 @@ class RoboCrawler:
             
             try:
                 response = self.session.get(url)
+                if response.status_code in (401, 403):
+                    raise AuthError(f"列表接口返回 {response.status_code}")
                 response.raise_for_status()
                 data = response.json()
+                if not data.get('data'):
+                    raise AuthError(f"列表接口未返回数据: {data.get('message')}")
                 
                 # 提取报告ID
                 for item in data['data']['list']:
                     if item['type'] == 'EXTERNAL_REPORT':
-                        self.idset.add(item['data']['id'])
+                        found.add(item['data']['id'])
                 
                 # 检查是否还有下一页
                 if page_now >= data['data']['pageCount']:
@@ -99,34 +225,96 @@ class RoboCrawler:
                 page_now += 1
                 time.sleep(1)  # 避免请求过快
                 
+            except AuthError:
+                raise
             except Exception as e:
                 logger.error(f"获取报告列表失败: {str(e)}")
                 raise
+        
+        return found
+    
+    def fetch_plan(self):
+        """按抓取计划并发执行所有查询，共享登录会话，报告ID跨查询去重"""
+        queries = self.plan['queries']
+        max_workers = min(self.plan['max_workers'], len(queries))
+        failed = []
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_query = {
+                executor.submit(self.fetch_report_list, query['params']): query
+                for query in queries
+            }
+            for future in as_completed(future_to_query):
+                query = future_to_query[future]
+                try:
+                    found = future.result()
+                    logger.info(f"查询 {query['name']} 获取到 {len(found)} 篇报告")
+                except Exception as e:
+                    logger.error(f"查询 {query['name']} 失败: {str(e)}")
+                    failed.append(query['name'])
+        
+        if len(failed) == len(queries):
+            raise RuntimeError(f"抓取计划中的所有查询均失败: {', '.join(failed)}")
+        logger.info(f"抓取计划完成，{len(queries)} 个查询去重后共 {len(self.idset)} 篇报告")
+    
+    def _resolve_download_url(self, report_id):
+        """请求单篇报告的下载地址并写入缓存，没有下载链接时返回None"""
+        overview_url = f"{self.config['report_overview_url']}/{report_id}/pdf"
+        response = self.session.get(overview_url, headers=HEADERS, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        
+        # 检查响应结构
+        if not data.get('data') or 'downloadUrl' not in data['data']:
+            return None
+        
+        download_url = data['data']['downloadUrl']
+        self.url_cache.put(str(report_id), download_url)
+        return download_url
+    
+    def get_download_url(self, report_id):
+        """获取下载地址：优先使用缓存，其次等待进行中的预解析结果，最后直接请求"""
+        key = str(report_id)
+        download_url = self.url_cache.get(key)
+        if download_url:
+            return download_url
+        
+        with self._prefetch_lock:
+            future = self._prefetching.get(key)
+        if future is not None:
+            # 预解析结果为None或抛出异常时直接交给调用方处理，避免重复请求
+            return future.result()
+        
+        return self._resolve_download_url(report_id)
+    
+    def prefetch_download_urls(self, report_ids):
+        """在后台提前解析下载地址，使PDF下载不必等待地址解析"""
+        for report_id in report_ids:
+            key = str(report_id)
+            if key in self.url_cache:
+                continue
+            with self._prefetch_lock:
+                if key in self._prefetching:
+                    continue
+                future = self._prefetch_executor.submit(self._resolve_download_url, key)
+                self._prefetching[key] = future
+            future.add_done_callback(lambda f, key=key: self._prefetch_done(key, f))
+    
+    def _prefetch_done(self, key, future):
+        """预解析结束后移除进行中标记"""
+        with self._prefetch_lock:
+            self._prefetching.pop(key, None)
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"预解析下载地址失败 {key}: {str(future.exception())}")
     
     def download_report(self, report_id, sequence, total_count):
-        """下载单篇报告"""
+        """下载单篇报告，返回是否成功"""
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                # 获取PDF下载地址
-                overview_url = f"{self.config['report_overview_url']}/{report_id}/pdf"
-                
-                # 添加随机User-Agent和请求头
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'application/json, text/plain, */*',
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                    'Referer': 'https://robo.datayes.com/',
-                    'Origin': 'https://robo.datayes.com',
-                    'Connection': 'keep-alive'
-                }
-                
-                response = self.session.get(overview_url, headers=headers, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                
-                # 检查响应结构
-                if 'data' not in data or 'downloadUrl' not in data['data']:
+                # 获取PDF下载地址（重试时复用仍在有效期内的缓存地址）
+                download_url = self.get_download_url(report_id)
+                if download_url is None:
                     logger.warning(f"报告 {report_id} 没有下载链接，可能需要重新登录")
                     # 如果是认证问题，重新获取cookies
                     if attempt == 0:
@@ -134,12 +322,13 @@ class RoboCrawler:
                         continue
                     else:
                         logger.error(f"报告 {report_id} 最终无法获取下载链接")
-                        return
-                
-                download_url = data['data']['downloadUrl']
+                        return False
                 
                 # 下载PDF
-                pdf_response = self.session.get(download_url, headers=headers, timeout=60)
+                pdf_response = self.session.get(download_url, headers=HEADERS, timeout=60)
+                if 400 <= pdf_response.status_code < 500:
+                    # 签名地址已失效或不可用，下次重试时重新解析
+                    self.url_cache.invalidate(str(report_id))
                 pdf_response.raise_for_status()
                 
                 # 保存PDF
@@ -148,8 +337,9 @@ class RoboCrawler:
                 with open(filename, 'wb') as f:
                     f.write(pdf_response.content)
                     
+                self.url_cache.invalidate(str(report_id))
                 logger.info(f"成功下载报告: {filename} 第{sequence}/{total_count}篇")
-                return  # 成功下载，退出重试循环
+                return True  # 成功下载，退出重试循环
                 
             except Exception as e:
                 logger.warning(f"下载报告失败 {report_id} (尝试 {attempt + 1}/{max_retries}): {str(e)}")
@@ -157,26 +347,74 @@ class RoboCrawler:
                     time.sleep(10 * (attempt + 1))  # 增加等待时间
                 else:
                     logger.error(f"下载报告最终失败 {report_id}: {str(e)}")
+        return False
+    
+    def process_queue(self):
+        """从持久化队列中领取并下载报告，直到队列中没有未完成的任务"""
+        processed = 0
+        try:
+            while True:
+                # 一次领取一小批任务，只为本进程持有的任务提前解析下载地址
+                batch = self.queue.lease_many(self.worker_id, self.prefetch_ahead)
+                if not batch:
+                    wait = self.queue.next_available_in()
+                    if wait is None:
+                        break
+                    # 剩余任务处于退避或被其他进程租用中，等待后再领取
+                    time.sleep(min(max(wait, 1), 60))
+                    continue
+                
+                self.prefetch_download_urls(batch)
+                
+                for report_id in batch:
+                    # 批内靠后的任务可能已等待较久，下载前续租
+                    if not self.queue.renew(report_id, self.worker_id):
+                        logger.warning(f"任务 {report_id} 的租约已失效，跳过")
+                        continue
+                    
+                    status = self.queue.get_status()
+                    total_count = processed + status['pending'] + status['leased']
+                    if self.download_report(report_id, processed + 1, total_count):
+                        self.queue.complete(report_id, self.worker_id)
+                    else:
+                        self.queue.fail(report_id, self.worker_id, '下载失败')
+                    processed += 1
+                    
+                    # 每下载5篇报告后休息更长时间
+                    if processed % 5 == 0:
+                        logger.info("休息10秒...")
+                        time.sleep(10)
+                    else:
+                        time.sleep(3)  # 增加等待时间
+        finally:
+            self._prefetch_executor.shutdown(cancel_futures=True)
+        
+        logger.info(f"队列处理完毕，本进程处理 {processed} 篇，队列状态: {self.queue.get_status()}")
+    
+    def run_worker(self):
+        """仅消费已有队列，用于在同一台机器上启动多个下载进程"""
+        try:
+            self.login()
+            self.process_queue()
+        except Exception as e:
+            logger.error(f"下载进程运行失败: {str(e)}")
+            raise
     
     def run(self):
         """运行爬虫"""
         try:
             # 1. 登录获取cookies
-            self.login_with_edge()
+            self.login()
             
-            # 2. 获取报告列表
-            self.fetch_report_list()
+            # 2. 按抓取计划获取报告列表
+            self.fetch_plan()
             logger.info(f"共获取到 {len(self.idset)} 篇报告")
             start_time = time.time()
-            # 3. 下载报告
-            for i, report_id in enumerate(self.idset):
-                self.download_report(report_id, i, len(self.idset))
-                # 每下载5篇报告后休息更长时间
-                if (i + 1) % 5 == 0:
-                    logger.info("休息10秒...")
-                    time.sleep(10)
-                else:
-                    time.sleep(3)  # 增加等待时间
+            # 3. 写入持久化队列，已完成的报告不会重复下载
+            self.queue.enqueue(self.idset)
+            
+            # 4. 下载报告
+            self.process_queue()
             
             # 增加耗时信息
             end_time = time.time()
@@ -188,5 +426,10 @@ class RoboCrawler:
             raise
 
 if __name__ == "__main__":
+    # 配置日志
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     crawler = RoboCrawler()
     crawler.run()
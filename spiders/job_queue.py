@@ -0,0 +1,258 @@
+"""
+持久化任务队列
+基于SQLite保存待下载的报告ID，支持租约、可见性超时、退避重试和死信表，
+同一台机器上的多个爬虫进程可以同时从中领取任务
+
+注意：数据库文件必须位于本地磁盘。SQLite的文件锁在NFS/SMB等网络文件系统上不可靠，
+WAL模式依赖共享内存也无法跨机器使用，因此不支持多台机器共享同一数据库文件
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    def __init__(self, db_path: str = os.path.join('data', 'jobs.db'),
+                 visibility_timeout: int = 600, max_attempts: int = 5,
+                 base_backoff: int = 30, backoff_multiplier: int = 2,
+                 wal: bool = False):
+        """
+        初始化任务队列
+        
+        Args:
+            db_path: SQLite数据库文件路径
+            visibility_timeout: 租约有效期（秒），超时未完成的任务会被其他进程重新领取
+            max_attempts: 最大尝试次数，超过后移入死信表
+            base_backoff: 基础退避时间（秒）
+            backoff_multiplier: 退避倍数
+            wal: 是否启用WAL日志模式（读写并发更好，仅适用于本地磁盘）
+        """
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.backoff_multiplier = backoff_multiplier
+        self.wal = wal
+        
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """每次操作使用独立连接，保证多线程和多进程安全"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+    
+    def _init_db(self):
+        """创建任务表和死信表"""
+        conn = self._connect()
+        try:
+            if self.wal:
+                conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    report_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_status
+                ON jobs (status, available_at)
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    report_id TEXT PRIMARY KEY,
+                    attempts INTEGER NOT NULL,
+                    last_error TEXT,
+                    failed_at REAL NOT NULL
+                )
+            """)
+        finally:
+            conn.close()
+    
+    def enqueue(self, report_ids: Iterable) -> int:
+        """批量入队，已存在（包括已完成和死信）的报告ID会被忽略，返回新增数量"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            added = 0
+            for report_id in report_ids:
+                report_id = str(report_id)
+                if conn.execute('SELECT 1 FROM dead_letters WHERE report_id = ?',
+                                (report_id,)).fetchone():
+                    continue
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO jobs (report_id, created_at, updated_at) '
+                    'VALUES (?, ?, ?)',
+                    (report_id, now, now)
+                )
+                added += cursor.rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        logger.info(f"任务入队 {added} 个")
+        return added
+    
+    def _dead_letter(self, conn: sqlite3.Connection, report_id: str, attempts: int,
+                     error: str, now: float):
+        """将任务移入死信表（需在事务中调用）"""
+        conn.execute(
+            'INSERT OR REPLACE INTO dead_letters (report_id, attempts, last_error, failed_at) '
+            'VALUES (?, ?, ?, ?)',
+            (report_id, attempts, error, now)
+        )
+        conn.execute('DELETE FROM jobs WHERE report_id = ?', (report_id,))
+        logger.error(f"任务 {report_id} 失败 {attempts} 次，移入死信表")
+    
+    def lease(self, worker_id: str) -> Optional[str]:
+        """领取一个可执行的任务，返回报告ID；没有可领取的任务时返回None"""
+        report_ids = self.lease_many(worker_id, 1)
+        return report_ids[0] if report_ids else None
+    
+    def lease_many(self, worker_id: str, limit: int) -> List[str]:
+        """一次领取最多 limit 个可执行的任务，返回报告ID列表"""
+        now = time.time()
+        leased = []
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            while len(leased) < limit:
+                row = conn.execute("""
+                    SELECT report_id, status, attempts FROM jobs
+                    WHERE (status = 'pending' AND available_at <= ?)
+                       OR (status = 'leased' AND lease_expires <= ?)
+                    ORDER BY available_at
+                    LIMIT 1
+                """, (now, now)).fetchone()
+                if row is None:
+                    break
+                
+                report_id, status, attempts = row
+                if status == 'leased':
+                    # 租约超时说明上一次执行未能正常结束（进程崩溃或卡死），计为一次失败
+                    attempts += 1
+                    if attempts >= self.max_attempts:
+                        self._dead_letter(conn, report_id, attempts, '租约超时', now)
+                        continue
+                    logger.warning(f"任务 {report_id} 租约超时，重新领取")
+                
+                conn.execute("""
+                    UPDATE jobs
+                    SET status = 'leased', attempts = ?, lease_owner = ?, lease_expires = ?,
+                        updated_at = ?
+                    WHERE report_id = ?
+                """, (attempts, worker_id, now + self.visibility_timeout, now, report_id))
+                leased.append(report_id)
+            conn.execute('COMMIT')
+            return leased
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+    
+    def renew(self, report_id, worker_id: str) -> bool:
+        """续租任务，返回租约是否仍归该进程所有"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute("""
+                UPDATE jobs
+                SET lease_expires = ?, updated_at = ?
+                WHERE report_id = ? AND lease_owner = ? AND status = 'leased'
+            """, (now + self.visibility_timeout, now, str(report_id), worker_id))
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+    
+    def complete(self, report_id, worker_id: str):
+        """标记任务完成"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute("""
+                UPDATE jobs
+                SET status = 'done', lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE report_id = ? AND lease_owner = ?
+            """, (time.time(), str(report_id), worker_id))
+            if cursor.rowcount == 0:
+                logger.warning(f"任务 {report_id} 的租约已失效，完成状态未记录")
+        finally:
+            conn.close()
+    
+    def fail(self, report_id, worker_id: str, error: str = ''):
+        """标记任务失败，未超过最大次数时按退避时间重新排队，否则移入死信表"""
+        report_id = str(report_id)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT attempts FROM jobs WHERE report_id = ? AND lease_owner = ?',
+                (report_id, worker_id)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                logger.warning(f"任务 {report_id} 的租约已失效，失败状态未记录")
+                return
+            
+            attempts = row[0] + 1
+            if attempts >= self.max_attempts:
+                self._dead_letter(conn, report_id, attempts, error, now)
+            else:
+                delay = self.base_backoff * (self.backoff_multiplier ** (attempts - 1))
+                conn.execute("""
+                    UPDATE jobs
+                    SET status = 'pending', attempts = ?, available_at = ?, last_error = ?,
+                        lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                    WHERE report_id = ?
+                """, (attempts, now + delay, error, now, report_id))
+                logger.warning(f"任务 {report_id} 第 {attempts} 次失败，{delay} 秒后重试")
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+    
+    def next_available_in(self) -> Optional[float]:
+        """距离下一个任务可领取的秒数，队列中没有未完成任务时返回None"""
+        conn = self._connect()
+        try:
+            row = conn.execute("""
+                SELECT MIN(CASE WHEN status = 'pending' THEN available_at ELSE lease_expires END)
+                FROM jobs WHERE status IN ('pending', 'leased')
+            """).fetchone()
+        finally:
+            conn.close()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+    
+    def get_status(self) -> Dict:
+        """获取队列状态"""
+        conn = self._connect()
+        try:
+            status = {'pending': 0, 'leased': 0, 'done': 0}
+            for state, count in conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'):
+                status[state] = count
+            status['dead'] = conn.execute('SELECT COUNT(*) FROM dead_letters').fetchone()[0]
+        finally:
+            conn.close()
+        return status
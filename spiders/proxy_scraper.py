@@ -8,11 +8,9 @@ import re
 import time
 import json
 import logging
-from bs4 import BeautifulSoup
 from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ProxyScraper:
@@ -21,6 +19,11 @@ class ProxyScraper:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+    
+    def _parse_html(self, html: str):
+        """解析HTML，bs4仅在实际爬取时导入"""
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser')
         
     def scrape_kuaidaili(self) -> List[str]:
         """从快代理爬取免费代理"""
@@ -28,7 +31,7 @@ class ProxyScraper:
         try:
             url = 'https://www.kuaidaili.com/free/inha/'
             response = self.session.get(url, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             # 查找代理表格
             table = soup.find('table', class_='table table-bordered table-striped')
@@ -54,7 +57,7 @@ class ProxyScraper:
         try:
             url = 'https://www.89ip.cn/'
             response = self.session.get(url, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             # 查找代理表格
             table = soup.find('table', class_='layui-table')
@@ -80,7 +83,7 @@ class ProxyScraper:
         try:
             url = 'https://www.xicidaili.com/nn/'
             response = self.session.get(url, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             # 查找代理表格
             table = soup.find('table', id='ip_list')
@@ -106,7 +109,7 @@ class ProxyScraper:
         try:
             url = 'http://www.ip3366.net/free/'
             response = self.session.get(url, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             # 查找代理表格
             table = soup.find('table', class_='table table-bordered table-striped')
@@ -208,15 +211,15 @@ class ProxyScraper:
         except Exception as e:
             logger.error(f"保存代理失败: {e}")
 
-def main():
+def main(max_proxies: int = 30, filename: str = 'valid_proxies.json'):
     """主函数"""
     scraper = ProxyScraper()
     
     print("开始获取代理...")
-    valid_proxies = scraper.get_valid_proxies(max_proxies=30)
+    valid_proxies = scraper.get_valid_proxies(max_proxies=max_proxies)
     
     if valid_proxies:
-        scraper.save_proxies(valid_proxies)
+        scraper.save_proxies(valid_proxies, filename)
         print(f"\n成功获取 {len(valid_proxies)} 个可用代理:")
         for i, proxy in enumerate(valid_proxies, 1):
             print(f"{i:2d}. {proxy}")
@@ -224,4 +227,5 @@ def main():
         print("未获取到可用代理")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     main() 
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+下载地址缓存
+缓存已解析的PDF下载地址（downloadUrl），按签名地址中的过期时间自动失效，
+容量超限时淘汰最久未使用的条目
+"""
+
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+class DownloadUrlCache:
+    def __init__(self, maxsize: int = 256, default_ttl: int = 3600, safety_margin: int = 60):
+        """
+        初始化下载地址缓存
+        
+        Args:
+            maxsize: 最大缓存条目数
+            default_ttl: 无法从地址中解析过期时间时使用的有效期（秒）
+            safety_margin: 提前失效的安全余量（秒），避免使用即将过期的地址
+        """
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self.safety_margin = safety_margin
+        self._entries = OrderedDict()  # report_id -> (url, expires_at)
+        self._lock = threading.Lock()
+    
+    def _expires_at(self, url: str, now: float) -> float:
+        """根据签名参数 wsTime + keeptime 计算过期时间"""
+        query = parse_qs(urlparse(url).query)
+        try:
+            ws_time = int(query['wsTime'][0])
+            keeptime = int(query['keeptime'][0])
+            expires_at = ws_time + keeptime
+        except (KeyError, IndexError, ValueError):
+            expires_at = now + self.default_ttl
+        return expires_at - self.safety_margin
+    
+    def get(self, report_id) -> Optional[str]:
+        """获取未过期的下载地址"""
+        with self._lock:
+            entry = self._entries.get(report_id)
+            if entry is None:
+                return None
+            url, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[report_id]
+                logger.debug(f"报告 {report_id} 的下载地址已过期")
+                return None
+            self._entries.move_to_end(report_id)
+            return url
+    
+    def put(self, report_id, url: str):
+        """缓存下载地址，已过期的地址不会写入"""
+        now = time.time()
+        expires_at = self._expires_at(url, now)
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._entries[report_id] = (url, expires_at)
+            self._entries.move_to_end(report_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, report_id):
+        """移除下载地址，例如下载返回403时"""
+        with self._lock:
+            self._entries.pop(report_id, None)
+    
+    def __contains__(self, report_id) -> bool:
+        return self.get(report_id) is not None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# spiders 目录下的模块以脚本方式互相导入
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'spiders'))
@@ -0,0 +1,25 @@
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+
+import cli
+
+class CliTest(unittest.TestCase):
+    def parse_error(self, argv):
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit) as ctx:
+            cli.main(argv)
+        return ctx.exception.code
+    
+    def test_backfill_rejects_bad_date(self):
+        self.assertEqual(self.parse_error(['backfill', '--start', '2025', '--end', '20250617']), 2)
+    
+    def test_backfill_rejects_reversed_range(self):
+        self.assertEqual(self.parse_error(['backfill', '--start', '20250617', '--end', '20250101']), 2)
+    
+    def test_backfill_accepts_range(self):
+        args = cli.build_parser().parse_args(['backfill', '--start', '20250101', '--end', '20250617'])
+        self.assertIs(args.func, cli.cmd_backfill)
+        self.assertFalse(args.enqueue_only)
+
+if __name__ == '__main__':
+    unittest.main()
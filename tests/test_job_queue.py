@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import job_queue
+from job_queue import JobQueue
+
+class FakeClock:
+    def __init__(self, now=1000000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+class JobQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        patcher = mock.patch.object(job_queue.time, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.queue = JobQueue(
+            db_path=os.path.join(self.tmpdir.name, 'jobs.db'),
+            visibility_timeout=60, max_attempts=3, base_backoff=10, backoff_multiplier=2
+        )
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_enqueue_ignores_duplicates(self):
+        self.assertEqual(self.queue.enqueue([1, 2, 3]), 3)
+        self.assertEqual(self.queue.enqueue([3, 4]), 1)
+        self.assertEqual(self.queue.get_status()['pending'], 4)
+    
+    def test_completed_job_is_not_requeued(self):
+        self.queue.enqueue([1])
+        report_id = self.queue.lease('w1')
+        self.queue.complete(report_id, 'w1')
+        self.assertEqual(self.queue.enqueue([1]), 0)
+        self.assertIsNone(self.queue.lease('w1'))
+        self.assertEqual(self.queue.get_status()['done'], 1)
+    
+    def test_leased_job_is_invisible_until_timeout(self):
+        self.queue.enqueue([1])
+        self.assertEqual(self.queue.lease('w1'), '1')
+        self.assertIsNone(self.queue.lease('w2'))
+        self.clock.now += 61
+        self.assertEqual(self.queue.lease('w2'), '1')
+    
+    def test_lease_many_gives_disjoint_batches(self):
+        self.queue.enqueue([1, 2, 3])
+        first = self.queue.lease_many('w1', 2)
+        second = self.queue.lease_many('w2', 2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(self.queue.lease_many('w3', 2), [])
+    
+    def test_renew_extends_lease_for_owner_only(self):
+        self.queue.enqueue([1])
+        self.queue.lease('w1')
+        self.clock.now += 50
+        self.assertTrue(self.queue.renew('1', 'w1'))
+        self.assertFalse(self.queue.renew('1', 'w2'))
+        self.clock.now += 50
+        self.assertIsNone(self.queue.lease('w2'))
+    
+    def test_stale_lease_owner_cannot_complete(self):
+        self.queue.enqueue([1])
+        self.queue.lease('w1')
+        self.clock.now += 61
+        self.queue.lease('w2')
+        self.queue.complete('1', 'w1')
+        self.assertEqual(self.queue.get_status()['leased'], 1)
+        self.queue.complete('1', 'w2')
+        self.assertEqual(self.queue.get_status()['done'], 1)
+    
+    def test_fail_backs_off_exponentially(self):
+        self.queue.enqueue([1])
+        self.queue.fail(self.queue.lease('w1'), 'w1', 'err')
+        self.assertIsNone(self.queue.lease('w1'))
+        self.assertEqual(self.queue.next_available_in(), 10)
+        self.clock.now += 10
+        self.queue.fail(self.queue.lease('w1'), 'w1', 'err')
+        self.assertEqual(self.queue.next_available_in(), 20)
+    
+    def test_fail_moves_poison_job_to_dead_letters(self):
+        self.queue.enqueue([1])
+        for _ in range(3):
+            self.clock.now += 100
+            self.queue.fail(self.queue.lease('w1'), 'w1', 'err')
+        status = self.queue.get_status()
+        self.assertEqual(status['dead'], 1)
+        self.assertEqual(status['pending'], 0)
+        self.assertEqual(self.queue.enqueue([1]), 0)
+    
+    def test_expired_lease_counts_as_attempt_and_dead_letters(self):
+        self.queue.enqueue([1])
+        self.queue.lease('w1')
+        for worker_id in ('w2', 'w3'):
+            self.clock.now += 61
+            self.assertEqual(self.queue.lease(worker_id), '1')
+        self.clock.now += 61
+        self.assertIsNone(self.queue.lease('w4'))
+        self.assertEqual(self.queue.get_status()['dead'], 1)
+    
+    def test_wal_is_opt_in(self):
+        conn = sqlite3.connect(self.queue.db_path)
+        self.assertNotEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest import mock
+
+import url_cache
+from url_cache import DownloadUrlCache
+
+NOW = 1750172941
+
+def signed_url(ws_time, keeptime=86400):
+    return (f"https://bigdata-s3.datayes.com/researchreport/a.pdf"
+            f"?wsSecret=8212cfe7&wsTime={ws_time}&keeptime={keeptime}")
+
+class DownloadUrlCacheTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(url_cache.time, 'time', return_value=NOW)
+        self.time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = DownloadUrlCache(maxsize=2, default_ttl=3600, safety_margin=60)
+    
+    def test_expiry_follows_signed_url(self):
+        self.cache.put('1', signed_url(NOW, keeptime=600))
+        self.time.return_value = NOW + 539
+        self.assertIsNotNone(self.cache.get('1'))
+        self.time.return_value = NOW + 540
+        self.assertIsNone(self.cache.get('1'))
+    
+    def test_expired_url_is_not_cached(self):
+        self.cache.put('1', signed_url(NOW - 86400))
+        self.assertIsNone(self.cache.get('1'))
+    
+    def test_unsigned_url_uses_default_ttl(self):
+        self.cache.put('1', 'https://example.com/a.pdf')
+        self.time.return_value = NOW + 3539
+        self.assertIsNotNone(self.cache.get('1'))
+        self.time.return_value = NOW + 3540
+        self.assertIsNone(self.cache.get('1'))
+    
+    def test_evicts_least_recently_used(self):
+        self.cache.put('1', signed_url(NOW))
+        self.cache.put('2', signed_url(NOW))
+        self.cache.get('1')
+        self.cache.put('3', signed_url(NOW))
+        self.assertIn('1', self.cache)
+        self.assertNotIn('2', self.cache)
+        self.assertIn('3', self.cache)
+    
+    def test_invalidate(self):
+        self.cache.put('1', signed_url(NOW))
+        self.cache.invalidate('1')
+        self.assertIsNone(self.cache.get('1'))
+
+if __name__ == '__main__':
+    unittest.main()